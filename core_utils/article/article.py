@@ -5,7 +5,7 @@ import enum
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Protocol, Sequence
+from typing import Iterable, Optional, Protocol, Sequence
 
 from core_utils.constants import ASSETS_PATH
 
@@ -35,6 +35,20 @@ def split_by_sentence(text: str) -> list[str]:
     return sentences
 
 
+def join_conllu_sentences(sentences: Iterable[str]) -> str:
+    """
+    Joins CONLL-U representations of sentences into the text of an article
+    """
+    return '\n'.join(sentences) + '\n'
+
+
+def join_cleaned_sentences(sentences: Iterable[str]) -> str:
+    """
+    Joins cleaned sentences into the cleaned text of an article
+    """
+    return ' '.join(sentences)
+
+
 # pylint: disable=too-few-public-methods
 class SentenceProtocol(Protocol):
     """
@@ -74,6 +88,9 @@ class Article:
     Stores article raw, meta and conllu data
     """
 
+    __slots__ = ('url', 'article_id', 'title', 'date', 'author', 'topics', 'text',
+                 'pos_frequencies', '_conllu_sentences')
+
     date: Optional[datetime]
     _conllu_sentences: Sequence[SentenceProtocol]
 
@@ -119,8 +136,8 @@ class Article:
         """
         Gets the text in the CONLL-U format
         """
-        return '\n'.join([sentence.get_conllu_text(include_morphological_tags) for sentence in
-                          self._conllu_sentences]) + '\n'
+        return join_conllu_sentences(sentence.get_conllu_text(include_morphological_tags)
+                                     for sentence in self._conllu_sentences)
 
     def set_conllu_sentences(self, sentences: Sequence[SentenceProtocol]) -> None:
         """
@@ -138,8 +155,8 @@ class Article:
         """
         Returns the cleaned text
         """
-        return ' '.join([sentence.get_cleaned_sentence() for
-                         sentence in self._conllu_sentences])
+        return join_cleaned_sentences(sentence.get_cleaned_sentence()
+                                      for sentence in self._conllu_sentences)
 
     def _date_to_text(self) -> str:
         """
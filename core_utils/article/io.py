@@ -36,12 +36,19 @@ def from_raw(path: Union[Path, str],
     return article
 
 
+def to_artifact(article: Article, kind: ArtifactType, text: str) -> None:
+    """
+    Saves the given text as the artifact of the requested kind
+    """
+    with open(article.get_file_path(kind), 'w', encoding='utf-8') as file:
+        file.write(text)
+
+
 def to_cleaned(article: Article) -> None:
     """
     Saves cleaned text
     """
-    with open(article.get_file_path(ArtifactType.CLEANED), 'w', encoding='utf-8') as file:
-        file.write(article.get_cleaned_text())
+    to_artifact(article, ArtifactType.CLEANED, article.get_cleaned_text())
 
 
 def to_meta(article: Article) -> None:
@@ -92,7 +99,4 @@ def to_conllu(article: Article,
     if include_pymorphy_tags:
         article_type = ArtifactType.FULL_CONLLU
 
-    with open(file=article.get_file_path(article_type),
-              mode='w',
-              encoding='utf-8') as conllu_file:
-        conllu_file.write(article.get_conllu_text(include_morphological_tags))
+    to_artifact(article, article_type, article.get_conllu_text(include_morphological_tags))
@@ -1,17 +1,37 @@
 """
 Pipeline for CONLL-U formatting
 """
-from pathlib import Path
-from typing import List
+import multiprocessing
+import os
 import re
+import string
+import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
 
 from pymystem3 import Mystem
 
-from core_utils.article.article import SentenceProtocol, get_article_id_from_filepath, split_by_sentence
-from core_utils.article.io import from_raw, to_cleaned, to_conllu
+from core_utils.article.article import (Article, ArtifactType,
+                                        SentenceProtocol,
+                                        get_article_id_from_filepath,
+                                        join_cleaned_sentences,
+                                        join_conllu_sentences,
+                                        split_by_sentence)
+from core_utils.article.io import from_raw, to_artifact
 from core_utils.article.ud import OpencorporaTagProtocol, TagConverter
 from core_utils.constants import ASSETS_PATH
 
+_CLEAN_RE = re.compile(r'[^\w\s]')
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation.replace('_', '') + '«»—–…')
+_CYR_RE = re.compile(r'[а-я]+')
+_POS_RE = re.compile(r'[A-Z]+')
+_TAG_MAPPING_PATH = Path(__file__).parent / 'data' / 'mystem_tags_mapping.json'
+_HAS_ALNUM = re.compile(r'\w').search
+_SENTENCE_BREAK_RE = re.compile(r'[\n|\t]+')
+_CONLLU_ROW_SUFFIX = '\t0\troot\t_\t_'
+
 
 # pylint: disable=too-few-public-methods
 
@@ -52,30 +72,31 @@ class CorpusManager:
         if not self.path_to_raw_txt_data.is_dir():
             raise NotADirectoryError
 
-        if not any(self.path_to_raw_txt_data.iterdir()):
-            raise EmptyDirectoryError
+        is_empty = True
+        raw_ids = []
+        meta_ids = []
+        with os.scandir(self.path_to_raw_txt_data) as entries:
+            for entry in entries:
+                is_empty = False
+                if entry.name.endswith('_raw.txt'):
+                    ids = raw_ids
+                elif entry.name.endswith('_meta.json'):
+                    ids = meta_ids
+                else:
+                    continue
+                if not entry.stat().st_size:
+                    raise InconsistentDatasetError
+                ids.append(int(entry.name[:entry.name.index('_')]))
 
-        raw_files = [i for i in self.path_to_raw_txt_data.glob('*_raw.txt')]
-        meta_files = [file for file in self.path_to_raw_txt_data.glob('*_meta.json')]
+        if is_empty:
+            raise EmptyDirectoryError
 
-        if len(meta_files) != len(raw_files):
+        if len(meta_ids) != len(raw_ids):
             raise InconsistentDatasetError
 
-        for file in raw_files:
-            if not file.stat().st_size:
+        for ids in (raw_ids, meta_ids):
+            if ids and (min(ids) != 1 or max(ids) != len(ids) or len(set(ids)) != len(ids)):
                 raise InconsistentDatasetError
-        for file in meta_files:
-            if not file.stat().st_size:
-                raise InconsistentDatasetError
-
-        list_of_raw_ids = [int(file.name[:file.name.index('_')]) for file in raw_files]
-        list_of_meta_ids = [int(file.name[:file.name.index('_')]) for file in meta_files]
-
-        if sorted(list_of_raw_ids) != list(range(1, len(list_of_raw_ids) + 1)):
-            raise InconsistentDatasetError
-
-        if sorted(list_of_meta_ids) != list(range(1, len(list_of_meta_ids) + 1)):
-            raise InconsistentDatasetError
 
     def _scan_dataset(self) -> None:
         """
@@ -97,6 +118,8 @@ class MorphologicalTokenDTO:
     Stores morphological parameters for each token
     """
 
+    __slots__ = ('lemma', 'pos', 'tags')
+
     def __init__(self, lemma: str = "", pos: str = "", tags: str = ""):
         """
         Initializes MorphologicalTokenDTO
@@ -111,6 +134,8 @@ class ConlluToken:
     Representation of the CONLL-U Token
     """
 
+    __slots__ = ('_text', '_morphological_parameters', 'position')
+
     def __init__(self, text: str):
         """
         Initializes ConlluToken
@@ -135,27 +160,42 @@ class ConlluToken:
         """
         String representation of the token for conllu files
         """
-        position = str(self.position)
-        text = self._text
-        lemma = self._morphological_parameters.lemma
-        pos = self._morphological_parameters.pos
-        xpos = '_'
-        if include_morphological_tags and self._morphological_parameters.tags:
-            feats = self._morphological_parameters.tags
+        parameters = self._morphological_parameters
+        if include_morphological_tags and parameters.tags:
+            feats = parameters.tags
         else:
             feats = '_'
-        head = '0'
-        deprel = 'root'
-        deps = '_'
-        misc = '_'
-        return '\t'.join([position, text, lemma, pos, xpos, feats, head, deprel, deps, misc])
+        return f'{self._get_conllu_prefix()}{feats}{_CONLLU_ROW_SUFFIX}'
+
+    def get_conllu_texts(self) -> tuple[str, str]:
+        """
+        String representations of the token for conllu files
+        without and with morphological tags
+        """
+        prefix = self._get_conllu_prefix()
+        tags = self._morphological_parameters.tags
+        pos_text = f'{prefix}_{_CONLLU_ROW_SUFFIX}'
+        morphological_text = f'{prefix}{tags}{_CONLLU_ROW_SUFFIX}' if tags else pos_text
+        return pos_text, morphological_text
+
+    def _get_conllu_prefix(self) -> str:
+        """
+        Returns the fields of the conllu row that precede the morphological tags
+        """
+        parameters = self._morphological_parameters
+        return f'{self.position}\t{self._text}\t{parameters.lemma}\t{parameters.pos}\t_\t'
 
     def get_cleaned(self) -> str:
         """
         Returns lowercase original form of a token
         """
-        cleaned = re.sub(r'[^\w\s]', '', self._text.lower())
-        return cleaned
+        text = self._text.lower()
+        if text.isalnum():
+            return text
+        cleaned = text.translate(_PUNCTUATION_TABLE)
+        if not cleaned or cleaned.isalnum():
+            return cleaned
+        return _CLEAN_RE.sub('', cleaned)
 
 
 class ConlluSentence(SentenceProtocol):
@@ -172,29 +212,43 @@ class ConlluSentence(SentenceProtocol):
         self._tokens = tokens
 
     def _format_tokens(self, include_morphological_tags: bool) -> str:
-        conllu_tokens = []
-        for token in self._tokens:
-            conllu_tokens.append(token.get_conllu_text(include_morphological_tags))
-        return '\n'.join(conllu_tokens)
+        return '\n'.join(token.get_conllu_text(include_morphological_tags)
+                         for token in self._tokens)
+
+    def _get_header(self) -> str:
+        """
+        Returns the comment lines that precede the tokens of the sentence
+        """
+        return f"# sent_id = {self._position}\n# text = {self._text}\n"
 
     def get_conllu_text(self, include_morphological_tags: bool) -> str:
         """
         Creates string representation of the sentence
         """
-        return f"# sent_id = {self._position}\n# text = {self._text}\n" \
-               f"{self._format_tokens(include_morphological_tags)}\n"
+        return f"{self._get_header()}{self._format_tokens(include_morphological_tags)}\n"
+
+    def get_conllu_texts(self) -> tuple[str, str]:
+        """
+        Creates string representations of the sentence
+        without and with morphological tags in a single pass over tokens
+        """
+        pos_tokens = []
+        morphological_tokens = []
+        for token in self._tokens:
+            pos_token, morphological_token = token.get_conllu_texts()
+            pos_tokens.append(pos_token)
+            morphological_tokens.append(morphological_token)
+        header = self._get_header()
+        pos_text = '\n'.join(pos_tokens)
+        morphological_text = '\n'.join(morphological_tokens)
+        return f"{header}{pos_text}\n", f"{header}{morphological_text}\n"
 
     def get_cleaned_sentence(self) -> str:
         """
         Returns the lowercase representation of the sentence
         """
-        sentence = ''
-        for token in self._tokens:
-            cleaned_token = token.get_cleaned()
-            if cleaned_token:
-                sentence += cleaned_token + ' '
-        sentence = sentence.strip()
-        return sentence
+        cleaned_tokens = (token.get_cleaned() for token in self._tokens)
+        return ' '.join(cleaned for cleaned in cleaned_tokens if cleaned)
 
     def get_tokens(self) -> list[ConlluToken]:
         """
@@ -208,28 +262,54 @@ class MystemTagConverter(TagConverter):
     Mystem Tag Converter
     """
 
+    def __init__(self, tag_mapping_path: Path):
+        """
+        Initializes MystemTagConverter
+        """
+        super().__init__(tag_mapping_path)
+        categories = (self.case, self.number, self.gender, self.animacy, self.tense)
+        self._ordered_categories = sorted(categories)
+        self._tag_slots: dict[str, tuple[int, str]] = {}
+        for category in categories:
+            slot = self._ordered_categories.index(category)
+            for tag, value in self._tag_mapping[category].items():
+                self._tag_slots.setdefault(tag, (slot, value))
+        self._converted_tags: dict[str, str] = {}
+        self._converted_pos: dict[str, str] = {}
+
     def convert_morphological_tags(self, tags: str) -> str:  # type: ignore
         """
         Converts the Mystem tags into the UD format
         """
-        tag_list = re.findall(r'[а-я]+', tags)
-        format_tags = {}
+        if tags in self._converted_tags:
+            return self._converted_tags[tags]
 
-        for tag in tag_list:
-            for category in (self.case, self.number, self.gender, self.animacy, self.tense):
-                if tag in self._tag_mapping[category] and category not in format_tags:
-                    format_tags[category] = self._tag_mapping[category][tag]
-                    break
+        values = [''] * len(self._ordered_categories)
 
-        feats = '|'.join(f'{cat}={val}' for cat, val in sorted(format_tags.items()))
+        for tag in _CYR_RE.findall(tags):
+            if tag in self._tag_slots:
+                slot, value = self._tag_slots[tag]
+                if not values[slot]:
+                    values[slot] = value
+
+        feats = '|'.join(f'{category}={value}'
+                         for category, value in zip(self._ordered_categories, values) if value)
+        self._converted_tags[tags] = feats
         return feats
 
     def convert_pos(self, tags: str) -> str:  # type: ignore
         """
         Extracts and converts the POS from the Mystem tags into the UD format
         """
-        pos = re.search(r'[A-Z]+', tags)[0]
-        return self._tag_mapping[self.pos][pos]
+        if tags in self._converted_pos:
+            return self._converted_pos[tags]
+
+        pos = self._tag_mapping[self.pos][_POS_RE.search(tags)[0]]
+        self._converted_pos[tags] = pos
+        return pos
+
+
+_MYSTEM_TAG_CONVERTER = MystemTagConverter(_TAG_MAPPING_PATH)
 
 
 class OpenCorporaTagConverter(TagConverter):
@@ -259,33 +339,43 @@ class MorphologicalAnalysisPipeline:
         """
         self._corpus = corpus_manager
         self._mystem = Mystem()
-        tag_mapping_path = Path(__file__).parent / 'data' / 'mystem_tags_mapping.json'
-        self._tag_converter = MystemTagConverter(tag_mapping_path)
+        self._tag_converter = _MYSTEM_TAG_CONVERTER
+
+    def __getstate__(self) -> dict:
+        """
+        Leaves out the Mystem process, the tag converter and the corpus
+        when sent to a worker process
+        """
+        state = self.__dict__.copy()
+        state.pop('_mystem', None)
+        state.pop('_tag_converter', None)
+        state.pop('_corpus', None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores the pipeline in a worker process with its own Mystem instance
+        and the tag converter shared within that process
+        """
+        self.__dict__.update(state)
+        self._mystem = Mystem()
+        self._tag_converter = _MYSTEM_TAG_CONVERTER
 
     def _process(self, text: str) -> List[ConlluSentence]:
         """
         Returns the text representation as the list of ConlluSentence
         """
-        conllu_sentences = []
-        result = (i for i in self._mystem.analyze(text))
+        sentences = split_by_sentence(text)
+        sentence_tokens = self._group_by_sentence(text, sentences, self._mystem.analyze(text))
 
-        for idx_sent, sentence in enumerate(split_by_sentence(text)):
+        conllu_sentences = []
+        for idx_sent, (sentence, tokens) in enumerate(zip(sentences, sentence_tokens)):
             conllu_tokens = []
-            tokens = []
-
-            for token in result:
-                if token['text'] not in sentence:
-                    continue
-                sentence_subbed = re.sub(re.escape(token['text']), '', sentence, 1)
-                if any(c.isalnum() for c in token['text']):
-                    tokens.append(token)
-                if not any(c.isalnum() for c in sentence_subbed):
-                    break
             tokens.append({'text': '.'})
 
             for idx_token, token in enumerate(tokens, start=1):
                 if 'analysis' in token and token['analysis']:
-                    lex = token['analysis'][0]['lex']
+                    lex = sys.intern(token['analysis'][0]['lex'])
                     pos = self._tag_converter.convert_pos(token['analysis'][0]['gr'])
                     tags = self._tag_converter.convert_morphological_tags(
                         token['analysis'][0]['gr'])
@@ -310,15 +400,118 @@ class MorphologicalAnalysisPipeline:
 
         return conllu_sentences
 
+    @staticmethod
+    def _get_sentence_spans(text: str, sentences: list[str]) -> tuple[list[int], list[int]]:
+        """
+        Finds the start and end offsets of the sentences in the original text
+        """
+        # split_by_sentence replaces line breaks and tabs with '. ' before
+        # splitting, so offsets in the rewritten text are shifted back to the
+        # original one with the help of the anchors placed around every break
+        rewritten_anchors = [0]
+        original_anchors = [0]
+        shift = 0
+        for sentence_break in _SENTENCE_BREAK_RE.finditer(text):
+            rewritten_start = sentence_break.start() + shift
+            rewritten_anchors.extend((rewritten_start, rewritten_start + 2))
+            original_anchors.extend((sentence_break.start(), sentence_break.end()))
+            shift += 2 - len(sentence_break.group())
+        rewritten_text = _SENTENCE_BREAK_RE.sub('. ', text)
+
+        rewritten_bounds = []
+        cursor = 0
+        for sentence in sentences:
+            start = rewritten_text.find(sentence, cursor)
+            cursor = start + len(sentence)
+            rewritten_bounds.extend((start, cursor))
+
+        bounds = []
+        for position in rewritten_bounds:
+            anchor = bisect_right(rewritten_anchors, position) - 1
+            bounds.append(original_anchors[anchor] + position - rewritten_anchors[anchor])
+        return bounds[::2], bounds[1::2]
+
+    @classmethod
+    def _group_by_sentence(cls, text: str, sentences: list[str],
+                           analysis: list[dict]) -> list[list[dict]]:
+        """
+        Distributes the word tokens of the Mystem analysis among the sentences
+        """
+        starts, ends = cls._get_sentence_spans(text, sentences)
+        sentence_tokens: list[list[dict]] = [[] for _ in sentences]
+
+        # Mystem analyses the entire input, so the texts of its tokens add up
+        # to the original text and give the exact offset of every token;
+        # words of fragments dropped by split_by_sentence fall between spans
+        offset = 0
+        for token in analysis:
+            position = offset
+            offset += len(token['text'])
+            if _HAS_ALNUM(token['text']) is None:
+                continue
+            idx_sent = bisect_right(starts, position) - 1
+            if idx_sent >= 0 and position < ends[idx_sent]:
+                sentence_tokens[idx_sent].append(token)
+
+        return sentence_tokens
+
     def run(self) -> None:
         """
         Performs basic preprocessing and writes processed text to files
         """
-        for article in self._corpus.get_articles().values():
-            article.set_conllu_sentences(self._process(article.text))
-            to_cleaned(article)
-            to_conllu(article, include_morphological_tags=False)
-            to_conllu(article, include_morphological_tags=True)
+        articles = list(self._corpus.get_articles().values())
+        if not articles:
+            return
+
+        # Mystem cannot be shared between processes, so workers are spawned
+        # rather than forked and each of them starts its own instance
+        with ProcessPoolExecutor(max_workers=min(len(articles), os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            futures = {executor.submit(_process_in_worker, article.text): article
+                       for article in articles}
+            for future in as_completed(futures):
+                self._save(futures[future], future.result())
+
+    def _save(self, article: Article, conllu_sentences: List[ConlluSentence]) -> None:
+        """
+        Writes the cleaned text and both CONLL-U representations of the article
+        """
+        article.set_conllu_sentences(conllu_sentences)
+
+        cleaned_sentences = []
+        pos_sentences = []
+        morphological_sentences = []
+        for sentence in conllu_sentences:
+            pos_sentence, morphological_sentence = sentence.get_conllu_texts()
+            pos_sentences.append(pos_sentence)
+            morphological_sentences.append(morphological_sentence)
+            cleaned_sentences.append(sentence.get_cleaned_sentence())
+
+        to_artifact(article, ArtifactType.CLEANED, join_cleaned_sentences(cleaned_sentences))
+        to_artifact(article, ArtifactType.POS_CONLLU, join_conllu_sentences(pos_sentences))
+        to_artifact(article, ArtifactType.MORPHOLOGICAL_CONLLU,
+                    join_conllu_sentences(morphological_sentences))
+
+
+_WORKER_PIPELINE: Optional[MorphologicalAnalysisPipeline] = None
+
+
+def _init_worker(pipeline: MorphologicalAnalysisPipeline) -> None:
+    """
+    Stores the pipeline received by a worker process
+    """
+    global _WORKER_PIPELINE  # pylint: disable=global-statement
+    _WORKER_PIPELINE = pipeline
+
+
+def _process_in_worker(text: str) -> List[ConlluSentence]:
+    """
+    Processes the article text with the pipeline of the current worker process
+    """
+    assert _WORKER_PIPELINE is not None
+    return _WORKER_PIPELINE._process(text)  # pylint: disable=protected-access
 
 
 class AdvancedMorphologicalAnalysisPipeline(MorphologicalAnalysisPipeline):
@@ -0,0 +1,112 @@
+# pylint: disable=protected-access
+"""
+Tests for alignment of Mystem tokens with sentences
+"""
+import re
+import shutil
+import unittest
+from unittest import mock
+
+import pytest
+
+from config.test_params import TEST_PATH
+from core_utils.article.article import split_by_sentence
+from lab_6_pipeline.pipeline import (CorpusManager,
+                                     MorphologicalAnalysisPipeline)
+from lab_6_pipeline.tests.utils import pipeline_test_files_setup
+
+
+def analyze(text: str, pattern: str = r'\w+|\W+') -> list[dict]:
+    """
+    Splits the text into tokens the way Mystem does
+    """
+    tokens = []
+    for token in re.findall(pattern, text):
+        if token.isalpha():
+            tokens.append({'text': token,
+                           'analysis': [{'lex': token.lower(), 'gr': 'S,жен,неод=им,ед'}]})
+        else:
+            tokens.append({'text': token})
+    tokens.append({'text': '\n'})
+    return tokens
+
+
+def analyze_split_words(text: str) -> list[dict]:
+    """
+    Splits the text into tokens separating digits and underscores from letters
+    """
+    return analyze(text, r'\d+|_+|[^\W\d_]+|\W+')
+
+
+class SentenceAlignmentTest(unittest.TestCase):
+    """
+    Tests for distributing Mystem tokens among sentences
+    """
+
+    def setUp(self) -> None:
+        pipeline_test_files_setup(meta=True)
+        with mock.patch('lab_6_pipeline.pipeline.Mystem') as mystem:
+            self.mystem = mystem.return_value
+            self.mystem.analyze.side_effect = analyze
+            self.pipeline = MorphologicalAnalysisPipeline(
+                CorpusManager(path_to_raw_txt_data=TEST_PATH))
+
+    def check_alignment(self, text: str) -> None:
+        """
+        Ensures that each sentence gets exactly its own words and the final dot
+        """
+        sentences = self.pipeline._process(text)
+        analyzer = self.mystem.analyze.side_effect
+        expected = [[token['text'] for token in analyzer(sentence)
+                     if re.search(r'\w', token['text'])] + ['.']
+                    for sentence in split_by_sentence(text)]
+        processed = [[token.get_conllu_text(False).split('\t')[1]
+                      for token in sentence.get_tokens()] for sentence in sentences]
+        self.assertEqual(expected, processed)
+
+    @pytest.mark.mark4
+    @pytest.mark.mark6
+    @pytest.mark.mark8
+    @pytest.mark.mark10
+    @pytest.mark.stage_3_4_admin_data_processing
+    @pytest.mark.lab_6_pipeline
+    def test_repeated_words_stay_in_their_sentences(self):
+        """
+        Ensure that words repeated later in the text are not taken by the first sentence
+        """
+        self.check_alignment('Мама мыла раму и пела песню. Папа мыл раму и читал книгу. '
+                             'Потом мама и папа пили чай.')
+
+    @pytest.mark.mark4
+    @pytest.mark.mark6
+    @pytest.mark.mark8
+    @pytest.mark.mark10
+    @pytest.mark.stage_3_4_admin_data_processing
+    @pytest.mark.lab_6_pipeline
+    def test_dropped_fragment_prefix_of_next_word(self):
+        """
+        Ensure that a word of a dropped short fragment does not match
+        the beginning of a word in the next sentence
+        """
+        self.check_alignment('Да.\nДальше мы пошли домой, и там было хорошо. '
+                             'Вторая фраза тоже длинная.')
+
+    @pytest.mark.mark4
+    @pytest.mark.mark6
+    @pytest.mark.mark8
+    @pytest.mark.mark10
+    @pytest.mark.stage_3_4_admin_data_processing
+    @pytest.mark.lab_6_pipeline
+    def test_words_split_into_several_tokens(self):
+        """
+        Ensure that a word split by Mystem into several tokens
+        does not stop the alignment of the rest of the text
+        """
+        self.mystem.analyze.side_effect = analyze_split_words
+        self.check_alignment('Мы купили смартфон с 5G модемом вчера. '
+                             'Потом мы пошли домой и легли спать.')
+        self.check_alignment('Файл назывался data_backup и лежал на диске.\n'
+                             'Мы его нашли\tтолько утром. Скорость COVID19 была 10км в час.')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TEST_PATH)